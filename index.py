@@ -1,6 +1,16 @@
+import argparse
+import gzip
+import hashlib
 import json
 import os
-from datetime import datetime
+import re
+import unicodedata
+import zlib
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import combinations
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, scrolledtext
 from PIL import Image, ImageTk, ImageDraw
@@ -14,6 +24,59 @@ COR_BOTAO = "#3498db"  # Azul
 COR_BOTAO_HOVER = "#2980b9"  # Azul mais escuro
 COR_DESTAQUE = "#e74c3c"  # Vermelho
 
+# Arquivos de dados
+ARQUIVO_DADOS = "fichas_treino.json"
+ARQUIVO_ALUNOS = "alunos.json"
+PASTA_ARQUIVO = "arquivo_fichas"  # Fichas finalizadas (armazenamento frio)
+TAMANHO_LOTE = 50  # Fichas finalizadas acumuladas antes de gravar um lote
+PASTA_BACKUP = "backups"  # Backups incrementais
+FORMATO_ID_BACKUP = "%Y%m%d_%H%M%S_%f"  # Identificador = data e hora do backup
+
+# Divisão dos arquivos em blocos para o backup (tamanho definido pelo conteúdo)
+BLOCO_MINIMO = 2 * 1024
+BLOCO_MAXIMO = 64 * 1024
+MASCARA_BLOCO = ((1 << 13) - 1) << 51  # 13 bits mais altos: blocos de ~8 KB em média
+# Valor pseudoaleatório fixo por byte, usado pelo hash deslizante (gear hash)
+TABELA_GEAR = [int.from_bytes(hashlib.sha256(bytes([b])).digest()[:8], "big") for b in range(256)]
+
+# Situação das fichas
+STATUS_ATIVA = "ativa"
+STATUS_FINALIZADA = "finalizada"
+
+# Detecção de alunos duplicados
+LIMIAR_DUPLICADO = 0.85  # Pontuação mínima para considerar dois nomes o mesmo aluno
+LIMITE_BLOCO = 200  # Blocos maiores que isso só são usados cruzados com outro bloco
+PARTICULAS = {"da", "das", "de", "do", "dos", "e"}  # Não identificam o aluno
+
+def normalizar_nome(nome):
+    """Remover acentos, pontuação e espaços extras; converter para minúsculas"""
+    sem_acento = unicodedata.normalize("NFKD", nome)
+    sem_acento = "".join(c for c in sem_acento if not unicodedata.combining(c))
+    # Letras de qualquer alfabeto são mantidas ("Иван" não vira um nome vazio)
+    return " ".join(re.sub(r"[\W_]", " ", sem_acento.lower()).split())
+
+@lru_cache(maxsize=None)
+def codigo_fonetico(palavra):
+    """Código fonético simplificado para o português (ex.: Souza e Sousa -> SS)"""
+    if not palavra:
+        return ""
+
+    regras = [("ph", "f"), ("ch", "x"), ("sh", "x"), ("lh", "l"), ("nh", "n"),
+              ("qu", "k"), ("gue", "ge"), ("gui", "gi"), ("ce", "se"), ("ci", "si"),
+              ("c", "k"), ("z", "s"), ("y", "i"), ("w", "v"), ("h", "")]
+    for origem, destino in regras:
+        palavra = palavra.replace(origem, destino)
+
+    if not palavra:
+        return ""
+
+    # Mantém a primeira letra e as consoantes seguintes, sem letras dobradas
+    codigo = palavra[0]
+    for anterior, letra in zip(palavra, palavra[1:]):
+        if letra not in "aeiou" and letra != anterior:
+            codigo += letra
+    return codigo.upper()
+
 class TooltipManager:
     """Gerencia tooltips para widgets"""
     def __init__(self, widget, text):
@@ -126,6 +189,701 @@ class CustomButton(tk.Canvas):
         if self.command:
             self.command()
 
+class ArquivoFichas:
+    """Armazenamento frio das fichas finalizadas.
+
+    As fichas são gravadas em lotes compactados (gzip) que nunca são
+    reescritos. Cada aluno tem um índice próprio (JSON Lines) ao qual cada
+    ficha arquivada acrescenta uma linha com o lote e a posição; a busca lê
+    só o índice do aluno e abre só os lotes necessários.
+    """
+    def __init__(self, pasta=PASTA_ARQUIVO):
+        self.pasta = pasta
+        self.pasta_indice = os.path.join(pasta, "indice")
+
+    def caminho_indice(self, nome):
+        """Arquivo de índice do aluno, nomeado pelo nome normalizado"""
+        chave = normalizar_nome(nome).replace(" ", "_") or "_"
+        return os.path.join(self.pasta_indice, chave + ".jsonl")
+
+    @staticmethod
+    def ler_indice(caminho):
+        """Ler as entradas de um arquivo de índice, ignorando linhas incompletas"""
+        entradas = []
+        try:
+            with open(caminho, 'r', encoding='utf-8') as file:
+                for linha in file:
+                    try:
+                        entradas.append(json.loads(linha))
+                    except json.JSONDecodeError:
+                        continue  # Linha cortada por uma gravação interrompida
+        except FileNotFoundError:
+            pass
+        return entradas
+
+    def entradas_aluno(self, nome):
+        """Entradas do índice das fichas arquivadas de um aluno"""
+        return self.ler_indice(self.caminho_indice(nome))
+
+    def arquivar(self, fichas):
+        """Gravar as fichas em um novo lote compactado e devolver suas entradas no índice.
+
+        Fichas que já estão no índice (mesmo nome e data de início) não são
+        gravadas de novo; a entrada existente é devolvida no lugar.
+        """
+        existentes = {}  # (arquivo de índice, data_inicio) -> entrada
+        for caminho in {self.caminho_indice(ficha['nome']) for ficha in fichas}:
+            for entrada in self.ler_indice(caminho):
+                existentes[(caminho, entrada['data_inicio'])] = entrada
+
+        novas = [ficha for ficha in fichas
+                 if (self.caminho_indice(ficha['nome']), ficha['data_inicio']) not in existentes]
+
+        if novas:
+            self.gravar_lote(novas, existentes)
+
+        return [existentes[(self.caminho_indice(ficha['nome']), ficha['data_inicio'])] for ficha in fichas]
+
+    def gravar_lote(self, fichas, existentes):
+        """Gravar um lote e acrescentar suas entradas aos índices (e a `existentes`)"""
+        os.makedirs(self.pasta_indice, exist_ok=True)
+        lote = datetime.now().strftime("lote_%Y%m%d_%H%M%S_%f.json.gz")
+        with gzip.open(os.path.join(self.pasta, lote), 'wt', encoding='utf-8') as file:
+            json.dump(fichas, file, ensure_ascii=False)
+
+        novas_linhas = {}  # Arquivo de índice -> linhas a acrescentar
+        for posicao, ficha in enumerate(fichas):
+            entrada = {
+                'lote': lote,
+                'posicao': posicao,
+                'nome': ficha['nome'],
+                'aluno_id': ficha.get('aluno_id'),
+                'objetivo': ficha['objetivo'],
+                'data_inicio': ficha['data_inicio'],
+                'data_fim': ficha.get('data_fim'),
+                'status': STATUS_FINALIZADA
+            }
+            caminho = self.caminho_indice(ficha['nome'])
+            novas_linhas.setdefault(caminho, []).append(json.dumps(entrada, ensure_ascii=False) + "\n")
+            existentes[(caminho, ficha['data_inicio'])] = entrada
+
+        # Só acrescenta: o custo não depende do tamanho do histórico
+        for caminho, linhas in novas_linhas.items():
+            with open(caminho, 'a', encoding='utf-8') as file:
+                if self.linha_incompleta(caminho):
+                    file.write("\n")  # Isola o resto de uma gravação interrompida
+                file.writelines(linhas)
+
+    @staticmethod
+    def linha_incompleta(caminho):
+        """Indica se o arquivo termina sem quebra de linha (gravação interrompida)"""
+        try:
+            with open(caminho, 'rb') as file:
+                file.seek(0, os.SEEK_END)
+                if file.tell() == 0:
+                    return False
+                file.seek(-1, os.SEEK_END)
+                return file.read(1) != b"\n"
+        except FileNotFoundError:
+            return False
+
+    def alunos(self):
+        """Nomes normalizados dos alunos com fichas arquivadas (sem ler os índices)"""
+        if not os.path.isdir(self.pasta_indice):
+            return []
+        nomes = [nome[:-len(".jsonl")].replace("_", " ")
+                 for nome in sorted(os.listdir(self.pasta_indice)) if nome.endswith(".jsonl")]
+        return [nome for nome in nomes if normalizar_nome(nome)]
+
+    def carregar(self, entradas):
+        """Ler as fichas completas das entradas, abrindo cada lote uma única vez"""
+        lotes = {}
+        for entrada in entradas:
+            if entrada['lote'] not in lotes:
+                with gzip.open(os.path.join(self.pasta, entrada['lote']), 'rt', encoding='utf-8') as file:
+                    lotes[entrada['lote']] = json.load(file)
+
+        return [lotes[entrada['lote']][entrada['posicao']] for entrada in entradas]
+
+class DetectorDuplicados:
+    """Detecta nomes de alunos provavelmente duplicados.
+
+    Em vez de comparar todos os nomes entre si, cada nome é distribuído em
+    blocos (palavras normalizadas e seus códigos fonéticos) e apenas os nomes
+    que compartilham algum bloco são comparados.
+    """
+    def __init__(self):
+        self.grafias = {}  # Nome normalizado -> grafias originais
+        self.blocos = {}  # Chave de bloco -> nomes normalizados
+
+    @staticmethod
+    def palavras(normalizado):
+        """Palavras que identificam o nome (sem partículas como "da" e "dos")"""
+        palavras = [p for p in normalizado.split() if p not in PARTICULAS]
+        return palavras or normalizado.split()
+
+    @classmethod
+    def chaves_bloco(cls, normalizado):
+        """Chaves de bloco de um nome: cada palavra e seu código fonético"""
+        chaves = set()
+        for palavra in cls.palavras(normalizado):
+            chaves.add("p:" + palavra)
+            chaves.add("f:" + codigo_fonetico(palavra))
+        return chaves
+
+    @staticmethod
+    def pontuar(a, b):
+        """Semelhança entre dois nomes normalizados (0 a 1)"""
+        if a == b:
+            return 1.0
+
+        # Um nome contido no outro ("ana" e "ana souza")
+        palavras_a, palavras_b = set(a.split()), set(b.split())
+        if palavras_a <= palavras_b or palavras_b <= palavras_a:
+            return 0.9
+
+        fonetico_a = " ".join(codigo_fonetico(p) for p in a.split())
+        fonetico_b = " ".join(codigo_fonetico(p) for p in b.split())
+        grafia = SequenceMatcher(None, a, b)
+        som = SequenceMatcher(None, fonetico_a, fonetico_b)
+
+        # quick_ratio é um limite superior barato de ratio: descarta os pares
+        # que não teriam como chegar ao limiar antes da comparação completa
+        if grafia.quick_ratio() < LIMIAR_DUPLICADO and som.quick_ratio() * 0.95 < LIMIAR_DUPLICADO:
+            return min(grafia.quick_ratio(), som.quick_ratio() * 0.95)
+        return max(grafia.ratio(), som.ratio() * 0.95)
+
+    def adicionar(self, nome):
+        """Indexar um nome de aluno"""
+        normalizado = normalizar_nome(nome)
+        if not normalizado:
+            return
+
+        self.grafias.setdefault(normalizado, set()).add(nome.strip())
+        for chave in self.chaves_bloco(normalizado):
+            self.blocos.setdefault(chave, set()).add(normalizado)
+
+    def candidatos(self, normalizado):
+        """Nomes indexados que vale comparar com um nome normalizado"""
+        # Nomes que compartilham cada palavra (pela grafia ou pelo som)
+        por_palavra = [self.blocos.get("p:" + palavra, set()) | self.blocos.get("f:" + codigo_fonetico(palavra), set())
+                       for palavra in self.palavras(normalizado)]
+
+        # Blocos pequenos entram inteiros; os grandes (nomes comuns) só no
+        # cruzamento entre duas palavras, para não virar uma busca linear
+        candidatos = set()
+        grandes = []
+        for bloco in por_palavra:
+            if len(bloco) <= LIMITE_BLOCO:
+                candidatos |= bloco
+            else:
+                grandes.append(bloco)
+        for a, b in combinations(grandes, 2):
+            cruzamento = a & b
+            if len(cruzamento) <= LIMITE_BLOCO:
+                candidatos |= cruzamento
+
+        if normalizado in self.grafias:
+            candidatos.add(normalizado)
+        return candidatos
+
+    def verificar(self, nome):
+        """Listar (grafia, pontuação) dos nomes parecidos com um novo cadastro"""
+        normalizado = normalizar_nome(nome)
+
+        semelhantes = []
+        for candidato in self.candidatos(normalizado):
+            pontuacao = self.pontuar(normalizado, candidato)
+            if pontuacao < LIMIAR_DUPLICADO:
+                continue
+            # A mesma grafia é o mesmo aluno recebendo uma nova ficha
+            for grafia in self.grafias[candidato]:
+                if grafia != nome.strip():
+                    semelhantes.append((grafia, pontuacao))
+
+        return sorted(semelhantes, key=lambda item: item[1], reverse=True)
+
+    def relatorio(self):
+        """Listar (pontuação, grafias) de todos os prováveis duplicados"""
+        pares = []
+
+        # Grafias diferentes do mesmo nome normalizado ("Ana" e "ana ")
+        for grafias in self.grafias.values():
+            if len(grafias) > 1:
+                pares.append((1.0, sorted(grafias)))
+
+        # Mesmos candidatos da verificação no cadastro, para que o relatório
+        # aponte tudo o que a verificação apontaria (inclusive em nomes comuns)
+        for a in self.grafias:
+            for b in self.candidatos(a):
+                if b <= a:
+                    continue  # Cada par uma vez só
+
+                pontuacao = self.pontuar(a, b)
+                if pontuacao >= LIMIAR_DUPLICADO:
+                    pares.append((pontuacao, sorted(self.grafias[a] | self.grafias[b])))
+
+        return sorted(pares, key=lambda par: par[0], reverse=True)
+
+class CadastroAlunos:
+    """Cadastro persistente de alunos.
+
+    Cada aluno tem um id, o nome principal e os apelidos: os nomes
+    normalizados usados nas fichas dele ("ana", "ana souza"). As fichas
+    guardam o 'aluno_id', então grafias diferentes vinculadas ao mesmo aluno
+    formam um único histórico.
+    """
+    def __init__(self, caminho=ARQUIVO_ALUNOS):
+        self.caminho = caminho
+        self.alunos = {}  # Id -> aluno
+        self.por_apelido = {}  # Nome normalizado -> id
+        self.carregado = True  # False se o arquivo existe mas não pôde ser lido
+        for aluno in self.carregar():
+            self.registrar(aluno)
+        self.proximo_id = max(self.alunos, default=0) + 1
+
+    def carregar(self):
+        """Carregar a lista de alunos do disco"""
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []
+        except json.JSONDecodeError:
+            self.carregado = False
+            return []
+
+    def salvar(self):
+        """Gravar o cadastro de forma atômica (arquivo temporário + replace)"""
+        # Nunca sobrescrever um cadastro que não pôde ser lido
+        if not self.carregado:
+            return
+        temporario = self.caminho + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as file:
+            json.dump(list(self.alunos.values()), file, indent=4, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+
+    def registrar(self, aluno):
+        self.alunos[aluno['id']] = aluno
+        for apelido in aluno['apelidos']:
+            if apelido:  # Um apelido vazio juntaria alunos sem relação
+                self.por_apelido[apelido] = aluno['id']
+
+    def buscar(self, nome):
+        """Aluno que usa esse nome (ou None)"""
+        return self.alunos.get(self.por_apelido.get(normalizar_nome(nome)))
+
+    def obter(self, aluno_id):
+        """Aluno com esse id (ou None)"""
+        return self.alunos.get(aluno_id)
+
+    def criar(self, nome, aluno_id=None):
+        """Cadastrar um novo aluno (com o id informado, se houver)"""
+        if aluno_id is None:
+            aluno_id = self.proximo_id
+        apelido = normalizar_nome(nome)
+        aluno = {'id': aluno_id, 'nome': nome.strip(), 'apelidos': [apelido] if apelido else []}
+        self.proximo_id = max(self.proximo_id, aluno_id + 1)
+        self.registrar(aluno)
+        return aluno
+
+    def vincular(self, aluno, nome):
+        """Registrar outra grafia do nome como sendo do mesmo aluno"""
+        apelido = normalizar_nome(nome)
+        if apelido and apelido not in aluno['apelidos']:
+            aluno['apelidos'].append(apelido)
+            self.por_apelido[apelido] = aluno['id']
+
+    def garantir(self, nome, aluno_id=None):
+        """Aluno com esse nome, cadastrando-o (com o id informado) se ainda não existir"""
+        if aluno_id is not None:
+            # O id não deve ser reaproveitado por outro aluno
+            self.proximo_id = max(self.proximo_id, aluno_id + 1)
+        return self.buscar(nome) or self.criar(nome, aluno_id)
+
+class HistoricoAlunos:
+    """Linha do tempo das fichas de cada aluno.
+
+    Cada aluno do cadastro tem uma lista de fichas ordenada por data de
+    início. Fichas ativas ficam na lista como estão; as arquivadas só entram,
+    pelos índices do aluno (um por apelido), na primeira vez que a linha do
+    tempo dele é consultada, e o lote compactado só é lido quando o conteúdo
+    completo da ficha é necessário.
+    """
+    def __init__(self, arquivo, cadastro):
+        self.arquivo = arquivo
+        self.cadastro = cadastro
+        self.linhas = {}  # Id do aluno -> [(data_inicio, sequência, ficha)]
+        self.carregados = set()  # Apelidos cujo índice do arquivo já foi lido
+        self.sequencia = 0  # Desempate entre fichas com a mesma data
+
+    def aluno_da_ficha(self, ficha):
+        """Aluno da ficha: pelo 'aluno_id' ou, em registros antigos, pelo nome"""
+        aluno = self.cadastro.obter(ficha.get('aluno_id'))
+        if aluno is not None:
+            return aluno
+        # Sem id ou com id desconhecido (cadastro perdido): pelo nome, mantendo o id
+        return self.cadastro.garantir(ficha['nome'], ficha.get('aluno_id'))
+
+    def adicionar(self, ficha):
+        """Inserir uma ficha (ou entrada do arquivo) na linha do tempo do aluno"""
+        aluno = self.aluno_da_ficha(ficha)
+
+        self.sequencia += 1
+        insort(self.linhas.setdefault(aluno['id'], []), (ficha['data_inicio'], self.sequencia, ficha))
+
+    def carregar_arquivadas(self, aluno):
+        """Ler do arquivo as fichas arquivadas do aluno (uma única vez por apelido)"""
+        linha_tempo = self.linhas.setdefault(aluno['id'], [])
+        for apelido in aluno['apelidos']:
+            if apelido in self.carregados:
+                continue
+            self.carregados.add(apelido)
+
+            presentes = {(data, normalizar_nome(item['nome'])) for data, _, item in linha_tempo}
+            for entrada in self.arquivo.entradas_aluno(apelido):
+                # Ficha já presente (ativa ainda não removida ou recém-arquivada)
+                if (entrada['data_inicio'], normalizar_nome(entrada['nome'])) not in presentes:
+                    self.adicionar(entrada)
+
+    def substituir(self, ficha, entrada):
+        """Trocar uma ficha recém-arquivada pela sua entrada no índice"""
+        linha_tempo = self.linha_tempo_aluno(self.aluno_da_ficha(ficha))
+        posicao = bisect_left(linha_tempo, (ficha['data_inicio'],))
+        while posicao < len(linha_tempo) and linha_tempo[posicao][0] == ficha['data_inicio']:
+            data, sequencia, item = linha_tempo[posicao]
+            if item is ficha:
+                linha_tempo[posicao] = (data, sequencia, entrada)
+                return
+            posicao += 1
+
+    @staticmethod
+    def ativa(item):
+        """Indica se a ficha está ativa (entradas do arquivo estão sempre finalizadas)"""
+        return 'lote' not in item and item.get('status', STATUS_ATIVA) == STATUS_ATIVA
+
+    def linha_tempo_aluno(self, aluno):
+        """Lista (data_inicio, sequência, ficha) de um aluno, em ordem cronológica"""
+        self.carregar_arquivadas(aluno)
+        return self.linhas[aluno['id']]
+
+    def linha_tempo(self, nome):
+        """Linha do tempo do aluno que usa esse nome (vazia se não houver)"""
+        aluno = self.cadastro.buscar(nome)
+        return self.linha_tempo_aluno(aluno) if aluno else []
+
+    def historico(self, nome):
+        """Todas as fichas do aluno, da mais antiga para a mais recente"""
+        return [item for _, _, item in self.linha_tempo(nome)]
+
+    def ficha_atual(self, nome):
+        """Ficha ativa mais recente do aluno (ou a última, se todas estiverem finalizadas)"""
+        linha_tempo = self.linha_tempo(nome)
+        for _, _, item in reversed(linha_tempo):
+            if self.ativa(item):
+                return item
+        return linha_tempo[-1][2] if linha_tempo else None
+
+    def ficha_anterior(self, ficha):
+        """Ficha do mesmo aluno imediatamente anterior à informada"""
+        linha_tempo = self.linha_tempo_aluno(self.aluno_da_ficha(ficha))
+        posicao = bisect_left(linha_tempo, (ficha['data_inicio'],))
+        while posicao < len(linha_tempo) and linha_tempo[posicao][0] == ficha['data_inicio']:
+            if linha_tempo[posicao][2] is ficha:
+                break
+            posicao += 1
+        return linha_tempo[posicao - 1][2] if posicao > 0 else None
+
+    def completa(self, item):
+        """Ficha completa, lendo do arquivo compactado se necessário"""
+        if 'lote' in item:
+            return self.arquivo.carregar([item])[0]
+        return item
+
+    @staticmethod
+    def separar_exercicio(exercicio):
+        """Separar nome e prescrição: 'Supino 4x8' -> ('supino', '4x8')"""
+        encontrado = re.match(r"^(.*?)\s+(\d+\s*x\s*\d+|\d+\s*\w*)$", exercicio.strip())
+        if encontrado:
+            return normalizar_nome(encontrado.group(1)), encontrado.group(2).replace(" ", "")
+        return normalizar_nome(exercicio), ""
+
+    def comparar(self, anterior, atual):
+        """Exercícios adicionados, removidos e com séries/repetições alteradas"""
+        antes = {}
+        for exercicio in self.completa(anterior)['exercicios']:
+            nome, prescricao = self.separar_exercicio(exercicio)
+            antes[nome] = (exercicio, prescricao)
+
+        depois = {}
+        for exercicio in self.completa(atual)['exercicios']:
+            nome, prescricao = self.separar_exercicio(exercicio)
+            depois[nome] = (exercicio, prescricao)
+
+        return {
+            'adicionados': [depois[nome][0] for nome in depois if nome not in antes],
+            'removidos': [antes[nome][0] for nome in antes if nome not in depois],
+            'alterados': [(antes[nome][0], depois[nome][0]) for nome in depois
+                          if nome in antes and antes[nome][1] != depois[nome][1]]
+        }
+
+    def mudancas(self, ficha):
+        """Mudanças da ficha em relação à anterior do mesmo aluno (None se for a primeira)"""
+        anterior = self.ficha_anterior(ficha)
+        if anterior is None:
+            return None
+        return self.comparar(anterior, ficha)
+
+    @staticmethod
+    def formatar_mudancas(mudancas):
+        """Texto com as mudanças desde a ficha anterior"""
+        if mudancas is None:
+            return "Primeira ficha do aluno.\n"
+        if not any(mudancas.values()):
+            return "Nenhuma mudança nos exercícios.\n"
+
+        texto = ""
+        for exercicio in mudancas['adicionados']:
+            texto += f"+ {exercicio}\n"
+        for exercicio in mudancas['removidos']:
+            texto += f"- {exercicio}\n"
+        for antes, depois in mudancas['alterados']:
+            texto += f"~ {antes} -> {depois}\n"
+        return texto
+
+class BackupIncremental:
+    """Backups incrementais com blocos endereçados pelo conteúdo.
+
+    Cada arquivo é dividido em blocos cujas fronteiras dependem do próprio
+    conteúdo, e cada bloco é gravado uma única vez, com o nome igual ao seu
+    hash SHA-256. Um backup é só a lista de blocos de cada arquivo, então
+    apenas os blocos que mudaram desde o último backup ocupam espaço novo.
+    """
+    def __init__(self, pasta=PASTA_BACKUP):
+        self.pasta = pasta
+        self.pasta_blocos = os.path.join(pasta, "blocos")
+        self.pasta_snapshots = os.path.join(pasta, "snapshots")
+
+    @staticmethod
+    def dividir(dados):
+        """Dividir os bytes em blocos usando um hash deslizante (gear hash)"""
+        blocos = []
+        inicio = 0
+        while inicio < len(dados):
+            fim = min(inicio + BLOCO_MAXIMO, len(dados))
+            corte = fim
+            h = 0
+            for posicao in range(inicio + BLOCO_MINIMO, fim):
+                h = ((h << 1) + TABELA_GEAR[dados[posicao]]) & 0xFFFFFFFFFFFFFFFF
+                if not h & MASCARA_BLOCO:
+                    corte = posicao + 1
+                    break
+            blocos.append(dados[inicio:corte])
+            inicio = corte
+        return blocos
+
+    @staticmethod
+    def gravar_atomico(caminho, dados):
+        """Gravar bytes em arquivo temporário e substituir o destino"""
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        temporario = caminho + ".tmp"
+        with open(temporario, 'wb') as file:
+            file.write(dados)
+        os.replace(temporario, caminho)
+
+    def caminho_bloco(self, hash_bloco):
+        return os.path.join(self.pasta_blocos, hash_bloco[:2], hash_bloco)
+
+    def gravar_bloco(self, bloco):
+        """Gravar o bloco se ainda não existir; devolve (hash, bytes gravados)"""
+        hash_bloco = hashlib.sha256(bloco).hexdigest()
+        caminho = self.caminho_bloco(hash_bloco)
+        if os.path.exists(caminho):
+            return hash_bloco, 0
+
+        compactado = zlib.compress(bloco)
+        self.gravar_atomico(caminho, compactado)
+        return hash_bloco, len(compactado)
+
+    def ler_bloco(self, hash_bloco):
+        with open(self.caminho_bloco(hash_bloco), 'rb') as file:
+            return zlib.decompress(file.read())
+
+    def listar(self):
+        """Identificadores dos backups, do mais antigo para o mais recente"""
+        if not os.path.isdir(self.pasta_snapshots):
+            return []
+        return sorted(nome[:-len(".json")] for nome in os.listdir(self.pasta_snapshots)
+                      if re.fullmatch(r"\d{8}_\d{6}_\d{6}\.json", nome))
+
+    def carregar_snapshot(self, identificador):
+        """Ler o manifesto de um backup (ValueError se estiver ilegível)"""
+        with open(os.path.join(self.pasta_snapshots, identificador + ".json"), 'r', encoding='utf-8') as file:
+            snapshot = json.load(file)
+        if not isinstance(snapshot, dict) or not isinstance(snapshot.get('arquivos'), dict):
+            raise ValueError(f"Backup {identificador} ilegível")
+        return snapshot
+
+    def snapshot_em(self, momento):
+        """Último backup feito até o momento informado (ou None).
+
+        Aceita o identificador de um backup ou AAAA-MM-DD, opcionalmente com
+        HH:MM ou HH:MM:SS; um momento parcial vale até o fim do período.
+        Qualquer outro valor gera ValueError.
+        """
+        identificadores = self.listar()
+        if momento in identificadores:
+            return momento
+
+        formatos = [("%Y-%m-%d %H:%M:%S", timedelta(seconds=1)),
+                    ("%Y-%m-%d %H:%M", timedelta(minutes=1)),
+                    ("%Y-%m-%d", timedelta(days=1))]
+        for formato, periodo in formatos:
+            try:
+                limite = datetime.strptime(momento.strip(), formato) + periodo
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Momento inválido: '{momento}'. Use o identificador de um backup "
+                             "ou AAAA-MM-DD [HH:MM[:SS]].")
+
+        datas = [datetime.strptime(identificador, FORMATO_ID_BACKUP) for identificador in identificadores]
+        posicao = bisect_left(datas, limite)
+        return identificadores[posicao - 1] if posicao else None
+
+    @staticmethod
+    def arquivos_do_sistema():
+        """Arquivo de fichas ativas e todo o armazenamento frio"""
+        arquivos = [ARQUIVO_DADOS, ARQUIVO_ALUNOS]
+        for pasta, _, nomes in sorted(os.walk(PASTA_ARQUIVO)):
+            arquivos += [os.path.join(pasta, nome) for nome in sorted(nomes) if not nome.endswith(".tmp")]
+        return arquivos
+
+    def fazer_backup(self, arquivos=None):
+        """Fazer um backup incremental e devolver o relatório de bytes gravados"""
+        if arquivos is None:
+            arquivos = self.arquivos_do_sistema()
+
+        # Sem um último backup legível, todos os arquivos são lidos (backup completo)
+        anterior = {}
+        identificadores = self.listar()
+        if identificadores:
+            try:
+                anterior = self.carregar_snapshot(identificadores[-1])['arquivos']
+            except (OSError, ValueError):
+                anterior = {}
+
+        manifesto = {}
+        bytes_escritos = 0
+        tamanho_total = 0
+        for caminho in arquivos:
+            if not os.path.exists(caminho):
+                continue
+
+            estado = os.stat(caminho)
+            tamanho_total += estado.st_size
+
+            # Arquivo com mesmo tamanho e data de modificação: reaproveita os blocos
+            registro = anterior.get(caminho)
+            if (isinstance(registro, dict) and 'blocos' in registro and 'sha256' in registro
+                    and registro.get('tamanho') == estado.st_size
+                    and registro.get('modificado') == estado.st_mtime_ns):
+                manifesto[caminho] = registro
+                continue
+
+            with open(caminho, 'rb') as file:
+                dados = file.read()
+
+            hashes = []
+            for bloco in self.dividir(dados):
+                hash_bloco, escritos = self.gravar_bloco(bloco)
+                hashes.append(hash_bloco)
+                bytes_escritos += escritos
+
+            manifesto[caminho] = {
+                'tamanho': len(dados),
+                'modificado': estado.st_mtime_ns,
+                'sha256': hashlib.sha256(dados).hexdigest(),
+                'blocos': hashes
+            }
+
+        identificador = datetime.now().strftime(FORMATO_ID_BACKUP)
+        snapshot = {
+            'data': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'tamanho_total': tamanho_total,
+            'arquivos': manifesto
+        }
+        conteudo = json.dumps(snapshot, indent=4, ensure_ascii=False).encode('utf-8')
+        self.gravar_atomico(os.path.join(self.pasta_snapshots, identificador + ".json"), conteudo)
+
+        return {
+            'identificador': identificador,
+            'bytes_escritos': bytes_escritos + len(conteudo),
+            'tamanho_total': tamanho_total
+        }
+
+    def restaurar(self, identificador, destino="."):
+        """Recriar os arquivos exatamente como estavam no backup informado.
+
+        Ao restaurar sobre os dados em uso (destino igual à pasta atual), faz
+        antes um backup do estado atual e remove os arquivos que não existiam
+        no backup restaurado (lotes e índices criados depois dele). Devolve a
+        quantidade de arquivos e o identificador desse backup de segurança
+        (ou None).
+        """
+        snapshot = self.carregar_snapshot(identificador)
+
+        # Monta e confere tudo antes de gravar, para não restaurar pela metade
+        restaurados = {}
+        for caminho, registro in snapshot['arquivos'].items():
+            dados = b"".join(self.ler_bloco(hash_bloco) for hash_bloco in registro['blocos'])
+            if hashlib.sha256(dados).hexdigest() != registro['sha256']:
+                raise ValueError(f"Backup corrompido: {caminho}")
+            restaurados[caminho] = dados
+
+        # As alterações feitas depois do backup restaurado ainda podem ser recuperadas
+        seguranca = None
+        if os.path.abspath(destino) == os.path.abspath("."):
+            seguranca = self.fazer_backup()['identificador']
+
+            # Arquivos mais novos que o backup misturariam dados de outro momento
+            for caminho in self.arquivos_do_sistema():
+                if caminho not in snapshot['arquivos'] and os.path.exists(caminho):
+                    os.remove(caminho)
+
+        for caminho, dados in restaurados.items():
+            self.gravar_atomico(os.path.join(destino, caminho), dados)
+        return len(restaurados), seguranca
+
+    def verificar(self, identificador=None):
+        """Conferir os blocos de um backup (ou de todos); devolve a lista de problemas"""
+        identificadores = [identificador] if identificador else self.listar()
+
+        problemas = []
+        integros = {}  # Cada bloco é conferido uma única vez
+        for atual in identificadores:
+            try:
+                blocos = [(caminho, hash_bloco)
+                          for caminho, registro in self.carregar_snapshot(atual)['arquivos'].items()
+                          for hash_bloco in registro['blocos']]
+            except FileNotFoundError:
+                problemas.append(f"{atual}: backup não encontrado")
+                continue
+            except (OSError, ValueError, KeyError, TypeError):
+                problemas.append(f"{atual}: manifesto do backup ilegível ou corrompido")
+                continue
+
+            for caminho, hash_bloco in blocos:
+                if hash_bloco not in integros:
+                    try:
+                        integros[hash_bloco] = hashlib.sha256(self.ler_bloco(hash_bloco)).hexdigest() == hash_bloco
+                    except (OSError, zlib.error):
+                        integros[hash_bloco] = False
+                if not integros[hash_bloco]:
+                    problemas.append(f"{atual}: bloco {hash_bloco[:12]} de {caminho} ausente ou corrompido")
+        return problemas
+
 class SistemaAcademia:
     def __init__(self, root):
         self.root = root
@@ -136,7 +894,12 @@ class SistemaAcademia:
         self.root.minsize(800, 600)
         
         # Carregar dados
-        self.fichas_treino = []
+        self.fichas_treino = []  # Apenas fichas ativas (conjunto de trabalho)
+        self.arquivo = ArquivoFichas()
+        self.cadastro_alunos = CadastroAlunos()
+        self.detector = DetectorDuplicados()
+        self.historico = HistoricoAlunos(self.arquivo, self.cadastro_alunos)
+        self.backup = BackupIncremental()
 
         # Configurar o ícone da janela
         try:
@@ -227,12 +990,17 @@ class SistemaAcademia:
         btn_listar = CustomButton(self.sidebar_frame, text="Treinos em Andamento", 
                                  command=self.mostrar_listagem, icon="📋", width=200)
         btn_listar.pack(pady=5)
-        TooltipManager(btn_listar, "Visualizar todos os treinos cadastrados")
+        TooltipManager(btn_listar, "Visualizar os treinos ativos")
         
         btn_salvar = CustomButton(self.sidebar_frame, text="Salvar Dados", 
                                  command=self.salvar_dados, icon="💾", width=200)
         btn_salvar.pack(pady=5)
         TooltipManager(btn_salvar, "Salvar todas as fichas em arquivo")
+
+        btn_duplicados = CustomButton(self.sidebar_frame, text="Alunos Duplicados",
+                                     command=self.mostrar_relatorio_duplicados, icon="👥", width=200)
+        btn_duplicados.pack(pady=5)
+        TooltipManager(btn_duplicados, "Listar alunos cadastrados com nomes parecidos")
         
         btn_sair = CustomButton(self.sidebar_frame, text="Sair", 
                                command=self.sair, icon="❌", width=200)
@@ -426,9 +1194,13 @@ class SistemaAcademia:
         btn_frame = tk.Frame(listagem_frame, bg=COR_FUNDO)
         btn_frame.pack(fill=tk.X, pady=(0, 10))
         
-        btn_atualizar = ttk.Button(btn_frame, text="Atualizar Lista", 
+        btn_atualizar = ttk.Button(btn_frame, text="Atualizar Lista",
                                   command=self.atualizar_lista_treinos, width=15)
         btn_atualizar.pack(side=tk.RIGHT)
+
+        btn_finalizar = ttk.Button(btn_frame, text="Finalizar Treino",
+                                  command=self.finalizar_treino, width=15)
+        btn_finalizar.pack(side=tk.RIGHT, padx=(0, 10))
         
         # Treeview para exibir os treinos
         colunas = ("nome", "objetivo", "data")
@@ -461,8 +1233,9 @@ class SistemaAcademia:
         self.atualizar_lista_treinos()
     
     def atualizar_contador(self):
-        """Atualizar o contador de fichas cadastradas"""
-        self.contador_valor.config(text=str(len(self.fichas_treino)))
+        """Atualizar o contador de fichas cadastradas (apenas as ativas)"""
+        ativas = [f for f in self.fichas_treino if f.get('status', STATUS_ATIVA) == STATUS_ATIVA]
+        self.contador_valor.config(text=str(len(ativas)))
     
     def limpar_form_cadastro(self):
         """Limpar o formulário de cadastro"""
@@ -479,7 +1252,34 @@ class SistemaAcademia:
         if not nome:
             messagebox.showwarning("Aviso", "O nome do aluno é obrigatório!")
             return
-        
+
+        # Sem letras ou números o nome não identifica o aluno (seria o apelido vazio)
+        if not normalizar_nome(nome):
+            messagebox.showwarning("Aviso", "O nome do aluno deve conter letras ou números!")
+            return
+
+        # Um nome já usado é o mesmo aluno; um nome novo pode ser de um aluno já cadastrado
+        aluno = self.cadastro_alunos.buscar(nome)
+        if aluno is None:
+            duplicados = self.detector.verificar(nome)
+            if duplicados:
+                parecido = self.cadastro_alunos.buscar(duplicados[0][0])
+                lista = "\n".join(f"- {grafia} ({pontuacao:.0%})" for grafia, pontuacao in duplicados[:5])
+                resposta = messagebox.askyesnocancel("Possível duplicado",
+                                                     f"Já existem alunos com nome parecido:\n{lista}\n\n"
+                                                     f"Sim: vincular a ficha a {parecido['nome']}\n"
+                                                     "Não: cadastrar um novo aluno")
+                if resposta is None:
+                    return
+                if resposta:
+                    aluno = parecido
+                    self.cadastro_alunos.vincular(aluno, nome)
+
+            if aluno is None:
+                aluno = self.cadastro_alunos.criar(nome)
+                self.detector.adicionar(nome)
+            self.cadastro_alunos.salvar()
+
         # Processar exercícios
         lista_exercicios = [e.strip() for e in exercicios_text.split('\n') if e.strip()]
         
@@ -489,10 +1289,14 @@ class SistemaAcademia:
             'nome': nome,
             'objetivo': objetivo,
             'exercicios': lista_exercicios,
-            'data_inicio': data_inicio
+            'data_inicio': data_inicio,
+            'status': STATUS_ATIVA,
+            'data_fim': None,
+            'aluno_id': aluno['id']
         }
         
         self.fichas_treino.append(ficha)
+        self.historico.adicionar(ficha)
         self.salvar_dados()
         self.atualizar_contador()
         self.atualizar_lista_treinos()
@@ -502,76 +1306,122 @@ class SistemaAcademia:
         self.status_label.config(text=f"Ficha cadastrada para {nome}")
     
     def consultar_ficha(self):
-        """Consultar ficha por nome de aluno"""
-        nome = self.entry_busca.get().strip().lower()
-        
+        """Consultar ficha atual e histórico por nome de aluno"""
+        nome = self.entry_busca.get().strip()
+
         if not nome:
             messagebox.showwarning("Aviso", "Digite um nome para buscar!")
             return
-        
-        ficha_encontrada = None
-        for ficha in self.fichas_treino:
-            if ficha['nome'].lower() == nome:
-                ficha_encontrada = ficha
-                break
-        
+
+        ficha_encontrada = self.historico.ficha_atual(nome)
+
         self.resultado_text.config(state=tk.NORMAL)
         self.resultado_text.delete(1.0, tk.END)
-        
+
         if ficha_encontrada:
+            ficha_completa = self.historico.completa(ficha_encontrada)
+
             # Formatar resultado
-            resultado = f"Nome: {ficha_encontrada['nome']}\n"
-            resultado += f"Objetivo: {ficha_encontrada['objetivo']}\n"
-            resultado += f"Data início: {ficha_encontrada['data_inicio']}\n\n"
-            resultado += "Exercícios:\n"
-            
-            for i, exercicio in enumerate(ficha_encontrada['exercicios'], 1):
+            resultado = f"Nome: {ficha_completa['nome']}\n"
+            resultado += f"Objetivo: {ficha_completa['objetivo']}\n"
+            resultado += f"Data início: {ficha_completa['data_inicio']}\n"
+            if not self.historico.ativa(ficha_encontrada):
+                resultado += f"Finalizada em: {ficha_completa['data_fim']}\n"
+            resultado += "\nExercícios:\n"
+
+            for i, exercicio in enumerate(ficha_completa['exercicios'], 1):
                 resultado += f"{i}. {exercicio}\n"
-            
+
+            resultado += "\nMudanças desde a ficha anterior:\n"
+            resultado += self.historico.formatar_mudancas(self.historico.mudancas(ficha_encontrada))
+
+            resultado += "\n" + self.formatar_historico(nome)
+
             self.resultado_text.insert(tk.END, resultado)
-            self.status_label.config(text=f"Ficha de {ficha_encontrada['nome']} encontrada")
+            self.status_label.config(text=f"Ficha de {ficha_completa['nome']} encontrada")
         else:
             self.resultado_text.insert(tk.END, "Nenhuma ficha encontrada para este aluno.")
             self.status_label.config(text="Ficha não encontrada")
-        
+
         self.resultado_text.config(state=tk.DISABLED)
-    
+
+    def formatar_historico(self, nome):
+        """Texto com todas as fichas do aluno, da mais recente para a mais antiga"""
+        historico = self.historico.historico(nome)
+
+        texto = f"Histórico ({len(historico)} fichas):\n"
+        for ficha in reversed(historico):
+            if self.historico.ativa(ficha):
+                situacao = "ativa"
+            else:
+                situacao = f"finalizada em {ficha['data_fim']}"
+            texto += f"{ficha['data_inicio']} - {ficha['objetivo']} ({situacao})\n"
+        return texto
+
     def atualizar_lista_treinos(self):
         """Atualizar a lista de treinos na treeview"""
         # Limpar itens existentes
         for item in self.treinos_tree.get_children():
             self.treinos_tree.delete(item)
         
-        # Adicionar fichas à treeview
-        for ficha in self.fichas_treino:
-            self.treinos_tree.insert("", tk.END, values=(
+        # Adicionar fichas ativas à treeview (o iid é a posição na lista)
+        total = 0
+        for posicao, ficha in enumerate(self.fichas_treino):
+            if ficha.get('status', STATUS_ATIVA) != STATUS_ATIVA:
+                continue
+            self.treinos_tree.insert("", tk.END, iid=str(posicao), values=(
                 ficha['nome'],
                 ficha['objetivo'],
                 ficha['data_inicio']
             ))
-        
-        self.status_label.config(text=f"Lista atualizada: {len(self.fichas_treino)} treinos encontrados")
-    
+            total += 1
+
+        self.status_label.config(text=f"Lista atualizada: {total} treinos encontrados")
+
     def exibir_detalhes_treino(self, event):
         """Exibir detalhes do treino selecionado na treeview"""
         item = self.treinos_tree.focus()
         if not item:
             return
-        
-        values = self.treinos_tree.item(item, "values")
-        nome_aluno = values[0]
-        
-        # Buscar ficha completa
-        for ficha in self.fichas_treino:
-            if ficha['nome'] == nome_aluno:
-                self.mostrar_detalhes_ficha(ficha)
-                break
-    
+
+        self.mostrar_detalhes_ficha(self.fichas_treino[int(item)])
+
+    def finalizar_treino(self):
+        """Finalizar o treino selecionado e movê-lo para o arquivo"""
+        item = self.treinos_tree.focus()
+        if not item:
+            messagebox.showwarning("Aviso", "Selecione um treino na lista!")
+            return
+
+        ficha = self.fichas_treino[int(item)]
+        if not messagebox.askyesno("Finalizar", f"Finalizar o treino de {ficha['nome']}?"):
+            return
+
+        ficha['status'] = STATUS_FINALIZADA
+        ficha['data_fim'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        self.salvar_dados()
+        self.atualizar_contador()
+        self.atualizar_lista_treinos()
+        self.status_label.config(text=f"Treino de {ficha['nome']} finalizado")
+
+    def arquivar_finalizadas(self):
+        """Mover fichas finalizadas para o arquivo compactado, em lotes de TAMANHO_LOTE"""
+        finalizadas = [f for f in self.fichas_treino if f.get('status', STATUS_ATIVA) == STATUS_FINALIZADA]
+        if len(finalizadas) < TAMANHO_LOTE:
+            return 0
+
+        entradas = self.arquivo.arquivar(finalizadas)
+        for ficha, entrada in zip(finalizadas, entradas):
+            self.historico.substituir(ficha, entrada)
+        self.fichas_treino = [f for f in self.fichas_treino if f.get('status', STATUS_ATIVA) == STATUS_ATIVA]
+        return len(finalizadas)
+
     def mostrar_detalhes_ficha(self, ficha):
         """Exibir janela com detalhes completos da ficha"""
         detalhes_window = tk.Toplevel(self.root)
         detalhes_window.title(f"Detalhes do Treino - {ficha['nome']}")
-        detalhes_window.geometry("500x400")
+        detalhes_window.geometry("500x600")
         detalhes_window.configure(bg=COR_FUNDO)
         
         # Frame principal
@@ -671,7 +1521,22 @@ class SistemaAcademia:
         # Atualizar scrollregion após adicionar itens
         exercises_interior.update_idletasks()
         canvas.config(scrollregion=canvas.bbox("all"))
-        
+
+        # Histórico do aluno
+        lbl_historico = tk.Label(content, text="Histórico:",
+                                font=("Segoe UI", 18, "bold"), bg=COR_FUNDO, fg=COR_PRIMARIA)
+        lbl_historico.pack(anchor="w", pady=(10, 5))
+
+        historico_text = scrolledtext.ScrolledText(content, width=40, height=6,
+                                                  font=self.texto_font)
+        historico_text.pack(fill=tk.BOTH, expand=True)
+
+        texto = "Mudanças desde a ficha anterior:\n"
+        texto += self.historico.formatar_mudancas(self.historico.mudancas(ficha))
+        texto += "\n" + self.formatar_historico(ficha['nome'])
+        historico_text.insert(tk.END, texto)
+        historico_text.config(state=tk.DISABLED)
+
         # Botão de fechar
         btn_frame = tk.Frame(main_frame, bg=COR_FUNDO)
         btn_frame.pack(fill=tk.X, pady=(15, 0))
@@ -683,27 +1548,112 @@ class SistemaAcademia:
     def carregar_dados(self):
         """Carregar dados de fichas do arquivo"""
         try:
-            with open('fichas_treino.json', 'r', encoding='utf-8') as file:
+            with open(ARQUIVO_DADOS, 'r', encoding='utf-8') as file:
                 self.fichas_treino = json.load(file)
-            
+            carregado = True
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.fichas_treino = []
+            carregado = False
+
+        # Fichas e alunos do arquivo anteriores ao cadastro de alunos
+        alterado = self.migrar_alunos()
+
+        # Com fichas finalizadas suficientes para um lote, movê-las para o arquivo frio
+        if self.arquivar_finalizadas():
+            alterado = True
+
+        # Nunca sobrescrever um arquivo que não pôde ser lido
+        if alterado and carregado:
+            self.gravar_fichas_ativas()
+
+        if carregado:
             # Atualizar contador e status
             if hasattr(self, 'contador_valor'):
-                self.contador_valor.config(text=str(len(self.fichas_treino)))
-            
+                self.atualizar_contador()
+
             self.status_label.config(text=f"Dados carregados: {len(self.fichas_treino)} fichas")
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.fichas_treino = []
+        else:
             self.status_label.config(text="Nenhum dado encontrado. Iniciando novo arquivo.")
 
-    
+        if not self.cadastro_alunos.carregado:
+            messagebox.showwarning("Aviso", f"Não foi possível ler {ARQUIVO_ALUNOS}. "
+                                            "Os alunos foram reconstruídos a partir das fichas, "
+                                            "mas o arquivo não será sobrescrito.")
+
+        # Indexar alunos e fichas ativas; as arquivadas entram no histórico sob demanda
+        self.detector = DetectorDuplicados()
+        self.historico = HistoricoAlunos(self.arquivo, self.cadastro_alunos)
+        for aluno in self.cadastro_alunos.alunos.values():
+            self.detector.adicionar(aluno['nome'])
+        for ficha in self.fichas_treino:
+            self.historico.adicionar(ficha)
+
+    def migrar_alunos(self):
+        """Cadastrar alunos de fichas sem 'aluno_id' (ou com id desconhecido) e de índices do arquivo"""
+        alterado = False
+        for ficha in self.fichas_treino:
+            if self.cadastro_alunos.obter(ficha.get('aluno_id')) is None:
+                ficha['aluno_id'] = self.cadastro_alunos.garantir(ficha['nome'], ficha.get('aluno_id'))['id']
+                alterado = True
+        for nome in self.arquivo.alunos():
+            if self.cadastro_alunos.buscar(nome) is None:
+                self.cadastro_alunos.criar(nome)
+                alterado = True
+
+        # O cadastro é gravado antes das fichas que passam a referenciá-lo
+        if alterado:
+            self.cadastro_alunos.salvar()
+        return alterado
+
+
+    def gravar_fichas_ativas(self):
+        """Gravar o arquivo de fichas de forma atômica (arquivo temporário + replace)"""
+        temporario = ARQUIVO_DADOS + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as file:
+            json.dump(self.fichas_treino, file, indent=4, ensure_ascii=False)
+        os.replace(temporario, ARQUIVO_DADOS)
+
     def salvar_dados(self):
         """Salvar dados das fichas em arquivo com codificação UTF-8"""
-        with open('fichas_treino.json', 'w', encoding='utf-8') as file:
-            json.dump(self.fichas_treino, file, indent=4, ensure_ascii=False)
+        # Arquivar antes de regravar: se algo falhar no meio, a ficha não se perde
+        # (e o arquivamento ignora fichas que já estejam no índice)
+        self.arquivar_finalizadas()
+        self.gravar_fichas_ativas()
         self.status_label.config(text=f"Dados salvos: {len(self.fichas_treino)} fichas")
         messagebox.showinfo("Sucesso", "Dados salvos com sucesso!")
 
     
+    def mostrar_relatorio_duplicados(self):
+        """Exibir janela com todos os prováveis alunos duplicados"""
+        pares = self.detector.relatorio()
+
+        relatorio_window = tk.Toplevel(self.root)
+        relatorio_window.title("Alunos Duplicados")
+        relatorio_window.geometry("500x400")
+        relatorio_window.configure(bg=COR_FUNDO)
+
+        main_frame = tk.Frame(relatorio_window, bg=COR_FUNDO, padx=20, pady=20)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        lbl_titulo = tk.Label(main_frame, text=f"Prováveis duplicados: {len(pares)}",
+                             font=self.subtitulo_font, bg=COR_FUNDO, fg=COR_PRIMARIA)
+        lbl_titulo.pack(anchor="w", pady=(0, 10))
+
+        texto = scrolledtext.ScrolledText(main_frame, width=40, height=12, font=self.texto_font)
+        texto.pack(fill=tk.BOTH, expand=True)
+
+        for pontuacao, grafias in pares:
+            texto.insert(tk.END, f"{pontuacao:.0%}  " + " / ".join(grafias) + "\n")
+        if not pares:
+            texto.insert(tk.END, "Nenhum aluno duplicado encontrado.")
+        texto.config(state=tk.DISABLED)
+
+        btn_fechar = ttk.Button(main_frame, text="Fechar",
+                               command=relatorio_window.destroy, width=15)
+        btn_fechar.pack(side=tk.RIGHT, pady=(15, 0))
+
+        self.status_label.config(text=f"Relatório de duplicados: {len(pares)} ocorrências")
+
     def mostrar_cadastro(self):
         """Mostrar aba de cadastro"""
         self.notebook.select(0)
@@ -718,17 +1668,86 @@ class SistemaAcademia:
         self.atualizar_lista_treinos()
     
     def sair(self):
-        """Salvar dados e fechar o programa"""
+        """Salvar dados, fazer backup e fechar o programa"""
         resposta = messagebox.askyesno("Sair", "Deseja salvar os dados antes de sair?")
         if resposta:
             self.salvar_dados()
-        self.root.destroy()
+
+        # O backup é incremental: só os blocos alterados desde o último são gravados.
+        # Uma falha no backup nunca impede o fechamento da janela.
+        try:
+            self.backup.fazer_backup()
+        except (OSError, ValueError, KeyError) as erro:
+            messagebox.showwarning("Aviso", f"Não foi possível fazer o backup: {erro}")
+        finally:
+            self.root.destroy()
+
+def executar_comando_backup(args):
+    """Executar os comandos de backup pela linha de comando"""
+    backup = BackupIncremental()
+
+    if args.comando == "backup":
+        relatorio = backup.fazer_backup()
+        total = relatorio['tamanho_total']
+        proporcao = relatorio['bytes_escritos'] / total if total else 0
+        print(f"Backup {relatorio['identificador']}: {relatorio['bytes_escritos']} bytes gravados "
+              f"(cópia completa: {total} bytes, {proporcao:.1%})")
+
+    elif args.comando == "backups":
+        for identificador in backup.listar():
+            try:
+                snapshot = backup.carregar_snapshot(identificador)
+                print(f"{identificador}  {snapshot['data']}  {snapshot['tamanho_total']} bytes")
+            except (OSError, ValueError, KeyError):
+                print(f"{identificador}  (ilegível)")
+
+    elif args.comando == "restaurar":
+        try:
+            identificador = backup.snapshot_em(args.momento)
+        except ValueError as erro:
+            print(erro)
+            return 1
+        if identificador is None:
+            print("Nenhum backup encontrado até esse momento.")
+            return 1
+        try:
+            total, seguranca = backup.restaurar(identificador, args.destino)
+        except (OSError, ValueError, KeyError, zlib.error) as erro:
+            print(f"Não foi possível restaurar o backup {identificador}: {erro}")
+            return 1
+        if seguranca:
+            print(f"Backup de segurança do estado anterior: {seguranca}")
+        print(f"Backup {identificador} restaurado: {total} arquivos")
+
+    elif args.comando == "verificar":
+        problemas = backup.verificar(args.identificador)
+        for problema in problemas:
+            print(problema)
+        if problemas:
+            return 1
+        print("Backups íntegros.")
+
+    return 0
 
 def main():
     """Função principal para iniciar o programa"""
+    parser = argparse.ArgumentParser(description="Academia Corpo em Movimento")
+    comandos = parser.add_subparsers(dest="comando")
+    comandos.add_parser("backup", help="Fazer um backup incremental das fichas")
+    comandos.add_parser("backups", help="Listar os backups existentes")
+    restaurar = comandos.add_parser("restaurar", help="Restaurar as fichas de um backup")
+    restaurar.add_argument("momento", help="Identificador do backup ou data/hora (AAAA-MM-DD HH:MM:SS)")
+    restaurar.add_argument("--destino", default=".", help="Pasta onde os arquivos serão restaurados")
+    verificar = comandos.add_parser("verificar", help="Conferir a integridade dos backups")
+    verificar.add_argument("identificador", nargs="?", help="Backup a conferir (padrão: todos)")
+    args = parser.parse_args()
+
+    if args.comando:
+        return executar_comando_backup(args)
+
     root = tk.Tk()
     app = SistemaAcademia(root)
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file